@@ -1,27 +1,154 @@
 import streamlit as st
+import pandas as pd
 import logging
-from database import (add_product, add_transaction, get_current_quantity,
+from database import (upsert_product, add_transaction, get_current_quantity,
                       get_last_price_before_date, get_last_purchase_date, get_purchase_history,
-                      get_all_products, get_product_id, get_transactions_by_date, delete_transaction,
-                      get_daily_transactions, calculate_daily_earnings, estimate_daily_needs,
+                      get_inventory_snapshot, get_product_id, find_product_ignore_case,
+                      find_products_like, get_transactions_by_date, delete_transaction,
+                      get_daily_transactions, calculate_daily_earnings, daily_summary_agg,
                       save_daily_summary, get_daily_summary, delete_daily_summary)
 from datetime import datetime, date
+from functools import lru_cache
 from typing import Optional, List, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Helper function to format date/time in 12-hour format
+# Helper function to format date/time in 12-hour format (memoized: listings repeat the same timestamps)
+@lru_cache(maxsize=4096)
 def format_date_time(date_time_str: Optional[str]) -> Optional[str]:
     if not date_time_str:
         return None
     try:
-        dt = datetime.strptime(date_time_str, "%Y-%m-%d %H:%M:%S")
+        dt = datetime.fromisoformat(date_time_str)
         return dt.strftime("%b %d, %Y, %I:%M %p")
     except ValueError:
         return date_time_str
 
+# Read-only report queries (Daily Summary, Historical Price Lookup), reused until the next write
+@st.cache_data(ttl=60)
+def _cached_daily_summary(selected_date: date) -> List[Tuple[str, str, float, Optional[float]]]:
+    return daily_summary_agg(selected_date)
+
+@st.cache_data(ttl=60)
+def _cached_last_price(product_id: int, selected_date: date) -> Optional[float]:
+    return get_last_price_before_date(product_id, selected_date)
+
+# Drop every cached query result; called after any write from the app
+def _clear_caches() -> None:
+    _cached_daily_summary.clear()
+    _cached_last_price.clear()
+
+# Show stock, last purchase and purchase history for one product row (optionally limited to one day)
+def _render_product_details(product: Tuple[int, str, str], selected_date: Optional[date]) -> None:
+    product_id, name, unit = product
+    quantity = get_current_quantity(product_id)
+    last_price = get_last_price_before_date(product_id)
+    last_date = get_last_purchase_date(product_id)
+    st.write(f"**{name}**")
+    st.write(f"- Current Quantity: {quantity} {unit}")
+    st.write(f"- Last Purchase Date: {format_date_time(last_date) if last_date else 'N/A'}")
+    st.write(f"- Last Total Cost: {last_price if last_price else 'N/A'} INR")
+
+    st.subheader("Purchase History")
+    history = get_purchase_history(product_id, on_date=selected_date)
+    if not history:
+        if selected_date:
+            st.write(f"No purchases found for {name} on {selected_date}.")
+        else:
+            st.write("No purchase history available.")
+    else:
+        for purchase_date, qty, price in history:
+            st.write(f"- Date: {format_date_time(purchase_date)}, Quantity: {qty} {unit}, Total Cost: {price:.2f} INR")
+
+# Deleting rows reruns only this fragment, not the whole page
+@st.fragment
+def _daily_listings(selected_date: date) -> None:
+    rows = pd.DataFrame(get_transactions_by_date(selected_date),
+                        columns=["id", "Product", "Quantity", "Total Cost (INR)", "Unit", "Date"]).set_index("id")
+    if rows.empty:
+        st.write("No purchases on this date.")
+        return
+
+    st.write(f"Purchases on {selected_date}:")
+    rows["Date"] = rows["Date"].map(format_date_time)
+    rows.insert(0, "Delete", False)
+    # The editor key is versioned so tick boxes reset once the rows they referred to are gone
+    version = st.session_state.setdefault("listings_version", 0)
+    edited = st.data_editor(rows, hide_index=True, disabled=list(rows.columns.drop("Delete")),
+                            key=f"listings_{selected_date}_{version}")
+    if st.button("Delete Selected", key="delete_selected"):
+        selected_ids = edited.index[edited["Delete"]]
+        if selected_ids.empty:
+            st.warning("Tick the rows you want to delete first.")
+            return
+        deleted = False
+        for trans_id in selected_ids:
+            success, message = delete_transaction(int(trans_id))
+            # Toasts survive the rerun below, so every result stays visible
+            st.toast(message, icon="✅" if success else "⚠️")
+            deleted = deleted or success
+        if deleted:
+            _clear_caches()
+            st.session_state.listings_version = version + 1
+            st.rerun(scope="fragment")
+
+# Calculating or saving reruns only this tab, not the whole page
+@st.fragment
+def _cashflow_tab() -> None:
+    selected_date = st.date_input("Select Date", value=date.today(), key="calc_date")
+    cash_in = st.number_input("Cash In Today (INR)", min_value=0.0, step=0.1, key="cash_in")
+    cash_out = st.number_input("Cash Out Today (INR)", min_value=0.0, step=0.1, key="cash_out")
+
+    if st.button("Calculate Daily Profit/Loss", key="calc_button"):
+        if cash_in < 0 or cash_out < 0:
+            st.error("Cash values cannot be negative.")
+        else:
+            daily_earnings = calculate_daily_earnings(selected_date)
+            purchase_costs = abs(daily_earnings) if daily_earnings < 0 else 0
+            total_cash_out = cash_out + purchase_costs
+            profit_loss = cash_in - total_cash_out
+
+            st.write(f"**Date:** {selected_date}")
+            st.write(f"**Cash In:** {cash_in:.2f} INR")
+            st.write(f"**Cash Out (Manual):** {cash_out:.2f} INR")
+            st.write(f"**Purchase Costs:** {purchase_costs:.2f} INR")
+            st.write(f"**Total Cash Out:** {total_cash_out:.2f} INR")
+            st.write(f"**Profit/Loss:** {profit_loss:.2f} INR")
+            if profit_loss >= 0:
+                st.success(f"Profit: {profit_loss:.2f} INR")
+            else:
+                st.error(f"Loss: {abs(profit_loss):.2f} INR")
+
+            st.session_state.daily_summary = {
+                'selected_date': selected_date,
+                'cash_in': cash_in,
+                'cash_out': cash_out,
+                'purchase_costs': purchase_costs,
+                'profit_loss': profit_loss
+            }
+
+    if 'daily_summary' in st.session_state and st.button("Save This Summary", key="save_button"):
+        try:
+            summary = st.session_state.daily_summary
+            save_daily_summary(
+                summary['selected_date'],
+                summary['cash_in'],
+                summary['cash_out'],
+                summary['purchase_costs'],
+                summary['profit_loss']
+            )
+            logger.info(f"Saved summary for {summary['selected_date']}: Cash In={summary['cash_in']}, Cash Out={summary['cash_out']}, Purchase Costs={summary['purchase_costs']}, Profit/Loss={summary['profit_loss']}")
+            st.success(f"Summary saved successfully for {summary['selected_date']}!", icon="✅")
+            st.session_state.cash_in = 0.0
+            st.session_state.cash_out = 0.0
+            del st.session_state.daily_summary
+            st.rerun(scope="fragment")
+        except Exception as e:
+            st.error(f"Failed to save summary: {e}")
+            logger.error(f"Error saving summary for {summary['selected_date']}: {e}")
+
 st.title("ShopEase - Grocery Inventory Management")
 
 # Sidebar menu
@@ -34,16 +161,15 @@ unit_options = ["kg", "grams", "kilograms", "quintal", "tons", "liters", "millil
 # Pages
 if choice == "View Inventory":
     st.subheader("Current Inventory")
-    products = get_all_products()
-    if not products:
+    snapshot = get_inventory_snapshot()
+    if not snapshot:
         st.write("No products in inventory.")
     else:
-        for product in products:
-            product_id, name, unit = product
-            quantity = get_current_quantity(product_id)
-            last_price = get_last_price_before_date(product_id)
-            last_date = get_last_purchase_date(product_id)
-            st.write(f"- {name}: {quantity} {unit}, Last Purchase Date: {format_date_time(last_date) if last_date else 'N/A'}, Last Total Cost: {last_price if last_price else 'N/A'} INR")
+        inventory = pd.DataFrame(
+            [(name, quantity, unit, format_date_time(last_date) if last_date else "N/A", last_price)
+             for _, name, unit, quantity, last_price, last_date in snapshot],
+            columns=["Product", "Quantity", "Unit", "Last Purchase Date", "Last Total Cost (INR)"])
+        st.dataframe(inventory, hide_index=True)
 
 elif choice == "Add Purchase":
     st.subheader("Add Purchase")
@@ -71,12 +197,11 @@ elif choice == "Add Purchase":
         elif total_purchase_cost <= 0:
             st.error("Total purchase cost must be greater than 0.")
         else:
-            product_id = get_product_id(product_name.strip())
-            if not product_id:
-                add_product(product_name.strip(), unit)
-                product_id = get_product_id(product_name.strip())
             try:
+                # Repeat purchases resolve from the product-id cache; only a new product pays for the upsert
+                product_id = get_product_id(product_name) or upsert_product(product_name.strip(), unit)
                 add_transaction(product_id, quantity, total_purchase_cost)
+                _clear_caches()
                 st.session_state.show_success = True
                 st.session_state.product_name = ""
                 st.session_state.quantity = 0.0
@@ -96,57 +221,7 @@ elif choice == "Daily Cash Flow":
     tab1, tab2 = st.tabs(["Calculate Today's Cash Flow", "View Historical Summary"])
 
     with tab1:
-        selected_date = st.date_input("Select Date", value=date.today(), key="calc_date")
-        cash_in = st.number_input("Cash In Today (INR)", min_value=0.0, step=0.1, key="cash_in")
-        cash_out = st.number_input("Cash Out Today (INR)", min_value=0.0, step=0.1, key="cash_out")
-
-        if st.button("Calculate Daily Profit/Loss", key="calc_button"):
-            if cash_in < 0 or cash_out < 0:
-                st.error("Cash values cannot be negative.")
-            else:
-                daily_earnings = calculate_daily_earnings(selected_date)
-                purchase_costs = abs(daily_earnings) if daily_earnings < 0 else 0
-                total_cash_out = cash_out + purchase_costs
-                profit_loss = cash_in - total_cash_out
-
-                st.write(f"**Date:** {selected_date}")
-                st.write(f"**Cash In:** {cash_in:.2f} INR")
-                st.write(f"**Cash Out (Manual):** {cash_out:.2f} INR")
-                st.write(f"**Purchase Costs:** {purchase_costs:.2f} INR")
-                st.write(f"**Total Cash Out:** {total_cash_out:.2f} INR")
-                st.write(f"**Profit/Loss:** {profit_loss:.2f} INR")
-                if profit_loss >= 0:
-                    st.success(f"Profit: {profit_loss:.2f} INR")
-                else:
-                    st.error(f"Loss: {abs(profit_loss):.2f} INR")
-
-                st.session_state.daily_summary = {
-                    'selected_date': selected_date,
-                    'cash_in': cash_in,
-                    'cash_out': cash_out,
-                    'purchase_costs': purchase_costs,
-                    'profit_loss': profit_loss
-                }
-
-        if 'daily_summary' in st.session_state and st.button("Save This Summary", key="save_button"):
-            try:
-                summary = st.session_state.daily_summary
-                save_daily_summary(
-                    summary['selected_date'],
-                    summary['cash_in'],
-                    summary['cash_out'],
-                    summary['purchase_costs'],
-                    summary['profit_loss']
-                )
-                logger.info(f"Saved summary for {summary['selected_date']}: Cash In={summary['cash_in']}, Cash Out={summary['cash_out']}, Purchase Costs={summary['purchase_costs']}, Profit/Loss={summary['profit_loss']}")
-                st.success(f"Summary saved successfully for {summary['selected_date']}!", icon="✅")
-                st.session_state.cash_in = 0.0
-                st.session_state.cash_out = 0.0
-                del st.session_state.daily_summary
-                st.rerun()
-            except Exception as e:
-                st.error(f"Failed to save summary: {e}")
-                logger.error(f"Error saving summary for {summary['selected_date']}: {e}")
+        _cashflow_tab()
 
     with tab2:
         view_date = st.date_input("Select Date to View Summary", value=date.today(), key="view_date")
@@ -170,6 +245,7 @@ elif choice == "Daily Cash Flow":
                     if st.button("Delete Summary and Transactions", key=f"delete_summary_{view_date.isoformat()}"):
                         success, message = delete_daily_summary(view_date)
                         if success:
+                            _clear_caches()
                             st.success(message)
                             st.rerun()
                         else:
@@ -192,106 +268,34 @@ elif choice == "Search Product":
             st.error("Please enter a product name.")
         else:
             normalized_search = search_term.strip().lower()
-            product_id = get_product_id(normalized_search)
-            
-            if not product_id:
-                products = get_all_products()
-                found = False
-                for p_id, name, unit in products:
-                    if normalized_search in name.lower():
-                        product_id = p_id
-                        found = True
-                        break
-                if not found:
-                    st.write("No products found.")
-                else:
-                    name = [p[1] for p in products if p[0] == product_id][0]
-                    unit = [p[2] for p in products if p[0] == product_id][0]
-                    quantity = get_current_quantity(product_id)
-                    last_price = get_last_price_before_date(product_id)
-                    last_date = get_last_purchase_date(product_id)
-                    st.write(f"**{name}**")
-                    st.write(f"- Current Quantity: {quantity} {unit}")
-                    st.write(f"- Last Purchase Date: {format_date_time(last_date) if last_date else 'N/A'}")
-                    st.write(f"- Last Total Cost: {last_price if last_price else 'N/A'} INR")
-                    
-                    st.subheader("Purchase History")
-                    history = get_purchase_history(product_id)
-                    if not history:
-                        st.write("No purchase history available.")
-                    else:
-                        filtered_history = history
-                        if selected_date:
-                            filtered_history = [
-                                (date, qty, price) for date, qty, price in history
-                                if datetime.strptime(date, "%Y-%m-%d %H:%M:%S").date() == selected_date
-                            ]
-                            if not filtered_history:
-                                st.write(f"No purchases found for {name} on {selected_date}.")
-                        
-                        for purchase_date, qty, price in filtered_history:
-                            st.write(f"- Date: {format_date_time(purchase_date)}, Quantity: {qty} {unit}, Total Cost: {price:.2f} INR")
+            # Both lookups return the live (id, name, unit) row, so details never mix in stale cached data
+            product = find_product_ignore_case(normalized_search)
+
+            if not product:
+                matches = find_products_like(normalized_search)
+                if matches:
+                    product = matches[0]
+            if not product:
+                st.write("No products found.")
             else:
-                name = [p[1] for p in get_all_products() if p[0] == product_id][0]
-                unit = [p[2] for p in get_all_products() if p[0] == product_id][0]
-                quantity = get_current_quantity(product_id)
-                last_price = get_last_price_before_date(product_id)
-                last_date = get_last_purchase_date(product_id)
-                st.write(f"**{name}**")
-                st.write(f"- Current Quantity: {quantity} {unit}")
-                st.write(f"- Last Purchase Date: {format_date_time(last_date) if last_date else 'N/A'}")
-                st.write(f"- Last Total Cost: {last_price if last_price else 'N/A'} INR")
-                
-                st.subheader("Purchase History")
-                history = get_purchase_history(product_id)
-                if not history:
-                    st.write("No purchase history available.")
-                else:
-                    filtered_history = history
-                    if selected_date:
-                        filtered_history = [
-                            (date, qty, price) for date, qty, price in history
-                            if datetime.strptime(date, "%Y-%m-%d %H:%M:%S").date() == selected_date
-                        ]
-                        if not filtered_history:
-                            st.write(f"No purchases found for {name} on {selected_date}.")
-                    
-                    for purchase_date, qty, price in filtered_history:
-                        st.write(f"- Date: {format_date_time(purchase_date)}, Quantity: {qty} {unit}, Total Cost: {price:.2f} INR")
+                _render_product_details(product, selected_date)
 
 elif choice == "Daily Listings":
     st.subheader("Daily Listings")
     selected_date = st.date_input("Select Date", value=date.today())
-    transactions = get_transactions_by_date(selected_date)
-    if not transactions:
-        st.write("No purchases on this date.")
-    else:
-        st.write(f"Purchases on {selected_date}:")
-        for trans in transactions:
-            trans_id, name, quantity, price, unit, trans_date = trans
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write(f"- {name}: {quantity} {unit} at {price:.2f} INR on {format_date_time(trans_date)}")
-            with col2:
-                if st.button("Delete", key=f"del_{trans_id}"):
-                    success, message = delete_transaction(trans_id)
-                    if success:
-                        st.success(message)
-                        st.rerun()
-                    else:
-                        st.error(message)
+    _daily_listings(selected_date)
 
 elif choice == "Daily Summary":
     st.subheader("Daily Summary")
     selected_date = st.date_input("Select Date for Summary", value=date.today())
-    earnings = calculate_daily_earnings(selected_date)
-    needs = estimate_daily_needs(selected_date)
-    
+    rows = _cached_daily_summary(selected_date)
+    earnings = sum(row[2] for row in rows)
+
     st.write(f"**Daily Earnings on {selected_date}: {earnings:.2f} INR**")
     st.write("**Estimated Product Needs:**")
-    for product, qty in needs.items():
-        unit = [p[2] for p in get_all_products() if p[1] == product][0]
-        st.write(f"- {product}: {qty:.2f} {unit}")
+    for product, unit, _, qty in rows:
+        if qty is not None:
+            st.write(f"- {product}: {qty:.2f} {unit}")
 
 elif choice == "Historical Price Lookup":
     st.subheader("Historical Price Lookup")
@@ -305,8 +309,7 @@ elif choice == "Historical Price Lookup":
             if not product_id:
                 st.error("Product not found.")
             else:
-                target_date = f"{selected_date} 23:59:59"
-                price = get_last_price_before_date(product_id, target_date)
+                price = _cached_last_price(product_id, selected_date)
                 if price is not None:
                     st.success(f"Total cost of {product_name} on {selected_date}: {price:.2f} INR")
                 else:
@@ -1,9 +1,15 @@
 import sqlite3
 import os
-import shutil
+import sys
 import logging
-from datetime import datetime, date
-from typing import Tuple, Optional, List, Dict
+import threading
+import queue
+import pathlib
+import atexit
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime, date, time, timedelta
+from typing import Tuple, Optional, List, Dict, Iterable, Iterator
 
 """
 database.py - Handles database operations for ShopEase, an inventory management app.
@@ -16,26 +22,58 @@ for scalability and reliability. Supports product names and units in English and
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Determine the database path dynamically
+# Resolve the database path once per process: SHOPEASE_DB overrides it, Hugging Face Spaces
+# provides persistent storage at /data, and local runs use ShopEase/data/inventory.db
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Directory of this file
-DATA_DIR = os.path.join(BASE_DIR, 'data')              # Local 'data' folder path
-DB_PATH = os.path.join(DATA_DIR, 'inventory.db')       # Local database path: ShopEase/data/inventory.db
-
-# Create the 'data' directory if it doesn’t exist (for local use)
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
-    logger.info(f"Created data directory at {DATA_DIR}")
-
-# Use /data/inventory.db for Hugging Face Spaces, otherwise use local path
-if os.path.exists('/data'):  # Check if running on Hugging Face Spaces
-    DB_PATH = '/data/inventory.db'
-    logger.info("Using Hugging Face Spaces database path: /data/inventory.db")
-else:
-    logger.info(f"Using local database path: {DB_PATH}")
-
-# Connect to the SQLite database
+DB_PATH = os.environ.get("SHOPEASE_DB") or (
+    '/data/inventory.db' if os.path.isdir('/data') else os.path.join(BASE_DIR, 'data', 'inventory.db'))
+os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
+logger.info(f"Using database path: {DB_PATH}")
+
+def _configure(connection: sqlite3.Connection) -> None:
+    """
+    Apply the performance and integrity PRAGMAs every connection to the database should use.
+    WAL lets readers run while a write is in progress, and synchronous=NORMAL is safe under WAL
+    while skipping the fsync on every commit. Temp tables, a 64 MB page cache and memory-mapped
+    reads keep hot pages out of the syscall path, and a 5 s busy timeout absorbs lock contention.
+    Logs a warning if the file system cannot run in WAL mode.
+    Args:
+        connection (sqlite3.Connection): Freshly opened connection to configure.
+    """
+    # Set first so the journal-mode switch below also waits for a competing writer (another
+    # session or process) instead of failing immediately with "database is locked"
+    connection.execute("PRAGMA busy_timeout=5000")
+    mode = connection.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    if mode.lower() != "wal":
+        # e.g. file systems without shared-memory support; everything still works, just slower
+        logger.warning(f"WAL journal mode unavailable, database is using {mode}")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA temp_store=MEMORY")
+    connection.execute("PRAGMA cache_size=-64000")  # Negative value = size in KiB
+    # Map up to 256 MB per connection (the writer plus pooled readers); a 32-bit process leaves mmap off
+    if sys.maxsize > 2**32:
+        connection.execute("PRAGMA mmap_size=268435456")
+    connection.execute("PRAGMA foreign_keys=ON")
+
+def _connect(path: str, **kwargs) -> sqlite3.Connection:
+    """
+    Open a configured connection to the database.
+    Args:
+        path (str): Path to the SQLite database file.
+        **kwargs: Extra keyword arguments passed to sqlite3.connect.
+    Returns:
+        sqlite3.Connection: The configured connection.
+    """
+    # Room for every distinct statement this module issues, so each is prepared once per connection
+    connection = sqlite3.connect(path, check_same_thread=False, cached_statements=256, **kwargs)
+    _configure(connection)
+    return connection
+
+# Connect to the SQLite database: the shared write connection, also used for schema setup
+# (opened once per process; Streamlit reruns reuse the imported module). It runs in autocommit
+# mode: the driver never opens a transaction of its own, every one starts with an explicit BEGIN.
 try:
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = _connect(DB_PATH, isolation_level=None)
     c = conn.cursor()
     logger.info("Successfully connected to the database")
 except sqlite3.Error as e:
@@ -44,6 +82,27 @@ except sqlite3.Error as e:
 
 # Create tables and indexes if they don’t exist
 try:
+    # Incremental auto-vacuum lets prune_old_transactions hand freed pages back to the file system.
+    # The mode only takes effect on an empty database or after a VACUUM, so convert older files once.
+    c.execute("PRAGMA auto_vacuum")
+    if c.fetchone()[0] != 2:  # 2 = INCREMENTAL
+        c.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        c.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+        if c.fetchone() is not None:
+            c.execute("VACUUM")
+            logger.info("Enabled incremental auto-vacuum on existing database")
+        else:
+            # A brand-new file also gets 8 KiB pages (shallower B-trees). The page size is fixed once
+            # the file is in WAL mode, so leave it briefly; rebuilding an empty database costs nothing.
+            c.execute("PRAGMA journal_mode=DELETE")
+            c.execute("PRAGMA page_size=8192")
+            c.execute("VACUUM")
+            c.execute("PRAGMA journal_mode=WAL")
+            logger.info("Initialized new database with 8 KiB pages and incremental auto-vacuum")
+
+    # Everything below (DDL and one-time migrations) commits once, or not at all if a step fails
+    c.execute("BEGIN IMMEDIATE")
+
     # Products table: stores product details
     c.execute('''CREATE TABLE IF NOT EXISTS products
                  (id INTEGER PRIMARY KEY AUTOINCREMENT, 
@@ -56,192 +115,676 @@ try:
                   product_id INTEGER NOT NULL,
                   quantity REAL NOT NULL,
                   price REAL,
-                  date TEXT NOT NULL,
+                  date INTEGER NOT NULL,
+                  unit_price REAL,
                   FOREIGN KEY(product_id) REFERENCES products(id))''')
 
-    # Daily Summaries table: stores daily cash flow summaries
+    # Dates used to be stored as local-time "YYYY-MM-DD HH:MM:SS" text. Rebuild older tables once with
+    # unix seconds (smaller rows, integer comparisons); indexes and triggers are recreated below.
+    # Rows without a known product were never visible anywhere and are not carried over; dates that
+    # do not parse become 0. Both kinds are first copied verbatim into transactions_quarantine.
+    c.execute("SELECT type FROM pragma_table_info('transactions') WHERE name = 'date'")
+    if c.fetchone()[0].upper() != "INTEGER":
+        c.execute('''CREATE TABLE IF NOT EXISTS transactions_quarantine
+                     (id INTEGER,
+                      product_id INTEGER,
+                      quantity REAL,
+                      price REAL,
+                      date TEXT,
+                      reason TEXT NOT NULL)''')
+        c.execute("""
+            INSERT INTO transactions_quarantine (id, product_id, quantity, price, date, reason)
+            SELECT id, product_id, quantity, price, date, reason
+            FROM (SELECT *, CASE WHEN product_id IS NULL OR product_id NOT IN (SELECT id FROM products) THEN 'dropped: unknown product'
+                                 WHEN quantity IS NULL THEN 'dropped: no quantity'
+                                 WHEN strftime('%s', date, 'utc') IS NULL THEN 'kept: date set to 0'
+                            END AS reason
+                  FROM transactions)
+            WHERE reason IS NOT NULL
+        """)
+        c.execute("SELECT COUNT(*) FROM transactions_quarantine WHERE reason = 'kept: date set to 0'")
+        coerced = c.fetchone()[0]
+        c.execute('''CREATE TABLE transactions_new
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                      product_id INTEGER NOT NULL,
+                      quantity REAL NOT NULL,
+                      price REAL,
+                      date INTEGER NOT NULL,
+                      unit_price REAL,
+                      FOREIGN KEY(product_id) REFERENCES products(id))''')
+        c.execute("""
+            INSERT INTO transactions_new (id, product_id, quantity, price, date, unit_price)
+            SELECT id, product_id, quantity, price, COALESCE(CAST(strftime('%s', date, 'utc') AS INTEGER), 0),
+                   CASE WHEN quantity <= 0 THEN price END
+            FROM transactions
+            WHERE product_id IN (SELECT id FROM products) AND quantity IS NOT NULL
+        """)
+        migrated = c.rowcount
+        c.execute("SELECT COUNT(*) FROM transactions")
+        dropped = c.fetchone()[0] - migrated
+        # Carry the AUTOINCREMENT counter over so IDs of deleted transactions are never reused
+        c.execute("DELETE FROM sqlite_sequence WHERE name = 'transactions_new'")
+        c.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'transactions_new', seq FROM sqlite_sequence WHERE name = 'transactions'")
+        c.execute("DROP TABLE transactions")
+        c.execute("ALTER TABLE transactions_new RENAME TO transactions")
+        logger.info(f"Converted {migrated} transaction date(s) to unix seconds")
+        if dropped:
+            logger.warning(f"Dropped {dropped} transaction(s) without a known product or quantity during date conversion; "
+                           "originals kept in transactions_quarantine")
+        if coerced:
+            logger.warning(f"Set the date of {coerced} transaction(s) with a missing or unparseable date to 0 "
+                           "(1970-01-01); originals kept in transactions_quarantine")
+
+    # Sales keep their per-unit selling price in unit_price; older sales stored it in price
+    c.execute("SELECT 1 FROM pragma_table_info('transactions') WHERE name = 'unit_price'")
+    if c.fetchone() is None:
+        c.execute("ALTER TABLE transactions ADD COLUMN unit_price REAL")
+        c.execute("UPDATE transactions SET unit_price = price WHERE quantity <= 0")
+        logger.info(f"Added unit_price to transactions, filled for {c.rowcount} sale(s)")
+
+    # Daily Summaries table: stores daily cash flow summaries, clustered on the date key
     c.execute('''CREATE TABLE IF NOT EXISTS daily_summaries
                  (date TEXT PRIMARY KEY,
                   cash_in REAL NOT NULL,
                   cash_out REAL NOT NULL,
                   purchase_costs REAL NOT NULL,
-                  profit_loss REAL NOT NULL)''')
+                  profit_loss REAL NOT NULL) WITHOUT ROWID''')
+
+    # Older databases keep summaries in a rowid table plus a separate index on date; rebuild once
+    c.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'daily_summaries'")
+    if "WITHOUT ROWID" not in c.fetchone()[0].upper():
+        c.execute('''CREATE TABLE daily_summaries_new
+                     (date TEXT PRIMARY KEY,
+                      cash_in REAL NOT NULL,
+                      cash_out REAL NOT NULL,
+                      purchase_costs REAL NOT NULL,
+                      profit_loss REAL NOT NULL) WITHOUT ROWID''')
+        c.execute("""
+            INSERT INTO daily_summaries_new (date, cash_in, cash_out, purchase_costs, profit_loss)
+            SELECT date, cash_in, cash_out, purchase_costs, profit_loss FROM daily_summaries WHERE date IS NOT NULL
+        """)
+        copied = c.rowcount
+        c.execute("DROP TABLE daily_summaries")
+        c.execute("ALTER TABLE daily_summaries_new RENAME TO daily_summaries")
+        logger.info(f"Rebuilt daily_summaries as a WITHOUT ROWID table ({copied} row(s))")
 
     # Add indexes for performance
     c.execute("CREATE INDEX IF NOT EXISTS idx_transactions_product_date ON transactions(product_id, date)")
-    c.execute("CREATE INDEX IF NOT EXISTS idx_daily_summaries_date ON daily_summaries(date)")
+    # Partial covering index for the "last purchase" lookups: only purchase rows, with price (and
+    # quantity, which SQLite re-checks against the partial-index condition) stored in the index so
+    # the newest row per product is one backward seek with no table fetch
+    c.execute("CREATE INDEX IF NOT EXISTS idx_transactions_purchase ON transactions(product_id, date, price, quantity) WHERE quantity > 0")
+    # Day-range queries (listings, earnings, summary deletes, pruning) filter on date alone
+    c.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date)")
+    # Case-insensitive exact-name lookups (find_product_ignore_case, used by Search Product)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_products_name_lower ON products(LOWER(name))")
+
+    # Product names are unique (needed by upsert_product). Older databases may hold duplicates,
+    # so fold each duplicate's transactions into the lowest ID before creating the index.
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_products_name'")
+    if c.fetchone() is None:
+        c.execute("""
+            UPDATE transactions
+            SET product_id = (SELECT MIN(p.id) FROM products p
+                              WHERE p.name = (SELECT name FROM products WHERE id = transactions.product_id))
+            WHERE product_id IN (SELECT id FROM products
+                                 WHERE name IS NOT NULL AND id NOT IN (SELECT MIN(id) FROM products GROUP BY name))
+        """)
+        c.execute("DELETE FROM products WHERE name IS NOT NULL AND id NOT IN (SELECT MIN(id) FROM products GROUP BY name)")
+        if c.rowcount > 0:
+            logger.info(f"Merged {c.rowcount} duplicate product(s) before adding unique name index")
+        c.execute("CREATE UNIQUE INDEX idx_products_name ON products(name)")
+
+    # Product Stock table: running quantity per product, kept in step with transactions by triggers
+    # so current stock is a single-row lookup instead of a SUM over the product's history
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_stock'")
+    stock_table_exists = c.fetchone() is not None
+    c.execute('''CREATE TABLE IF NOT EXISTS product_stock
+                 (product_id INTEGER PRIMARY KEY,
+                  qty REAL NOT NULL DEFAULT 0)''')
+    # The triggers round each running total to 9 decimals, so float noise from decimal quantities
+    # (0.1 + 0.7 - 0.7) never accumulates. Older triggers did not; replace them and clean up once.
+    c.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_transactions_stock_insert'")
+    row = c.fetchone()
+    if row is not None and "ROUND(" not in row[0].upper():
+        for trigger in ("trg_transactions_stock_insert", "trg_transactions_stock_delete", "trg_transactions_stock_update"):
+            c.execute(f"DROP TRIGGER {trigger}")
+        c.execute("UPDATE product_stock SET qty = ROUND(qty, 9) WHERE qty <> ROUND(qty, 9)")
+        logger.info(f"Rounded drifted stock for {c.rowcount} product(s)")
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_stock_insert AFTER INSERT ON transactions
+                 WHEN NEW.product_id IS NOT NULL
+                 BEGIN
+                     INSERT INTO product_stock (product_id, qty) VALUES (NEW.product_id, COALESCE(NEW.quantity, 0))
+                     ON CONFLICT(product_id) DO UPDATE SET qty = ROUND(qty + excluded.qty, 9);
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_stock_delete AFTER DELETE ON transactions
+                 BEGIN
+                     UPDATE product_stock SET qty = ROUND(qty - COALESCE(OLD.quantity, 0), 9) WHERE product_id = OLD.product_id;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_stock_update AFTER UPDATE OF product_id, quantity ON transactions
+                 BEGIN
+                     UPDATE product_stock SET qty = ROUND(qty - COALESCE(OLD.quantity, 0), 9) WHERE product_id = OLD.product_id;
+                     INSERT INTO product_stock (product_id, qty) SELECT NEW.product_id, COALESCE(NEW.quantity, 0)
+                     WHERE NEW.product_id IS NOT NULL
+                     ON CONFLICT(product_id) DO UPDATE SET qty = ROUND(qty + excluded.qty, 9);
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_products_stock_delete AFTER DELETE ON products
+                 BEGIN
+                     DELETE FROM product_stock WHERE product_id = OLD.id;
+                 END''')
+    if not stock_table_exists:
+        # One-time backfill from existing transactions
+        c.execute("""
+            INSERT INTO product_stock (product_id, qty)
+            SELECT product_id, ROUND(COALESCE(SUM(quantity), 0), 9) FROM transactions
+            WHERE product_id IS NOT NULL GROUP BY product_id
+        """)
+        logger.info(f"Backfilled stock for {c.rowcount} product(s)")
+
+    # Give the planner statistics for the partial and composite indexes on new, migrated or never
+    # analyzed databases; the PRAGMA optimize run at exit keeps them current afterwards
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+    if not stock_table_exists or c.fetchone() is None:
+        c.execute("ANALYZE")
+        logger.info("Analyzed database for the query planner")
     conn.commit()
     logger.info("Tables and indexes created/verified successfully")
 except sqlite3.Error as e:
+    conn.rollback()
     logger.error(f"Error creating tables or indexes: {e}")
     raise
 
+def _optimize_on_exit() -> None:
+    """
+    Let SQLite refresh planner statistics for tables that changed during this process.
+    """
+    try:
+        with _write_lock:
+            conn.execute("PRAGMA optimize")
+    except sqlite3.Error as e:
+        logger.error(f"Error optimizing database on exit: {e}")
+
+atexit.register(_optimize_on_exit)
+
+# Reads go through a pool of read-only connections, so they run concurrently under WAL and are
+# reused across Streamlit's per-run script threads; all writes go through the shared `conn`,
+# serialized by _write_lock. At most _READER_POOL_SIZE readers exist (each may hold a 64 MB cache
+# and a 256 MB mapping); a thread that finds them all busy waits for one to be returned.
+_READER_POOL_SIZE = 4
+# Resolved once, so readers open the writer's file even if the working directory changes later
+_READ_URI = f"{pathlib.Path(DB_PATH).resolve().as_uri()}?mode=ro"
+_reader_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=_READER_POOL_SIZE)
+_reader_slots = threading.BoundedSemaphore(_READER_POOL_SIZE)
+_write_lock = threading.RLock()
+
+@contextmanager
+def _reader() -> Iterator[sqlite3.Connection]:
+    """
+    Borrow a read-only connection from the pool, opening a new one if none is idle and the pool
+    is not yet full, or waiting for one otherwise.
+    It runs in autocommit mode, so every query sees the latest committed data.
+    Yields:
+        sqlite3.Connection: A read-only connection, returned to the pool on exit.
+    """
+    with _reader_slots:
+        try:
+            connection = _reader_pool.get_nowait()
+        except queue.Empty:
+            connection = _connect(_READ_URI, uri=True, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            _reader_pool.put_nowait(connection)
+
+# Hot-path queries. sqlite3 caches prepared statements keyed by SQL text, so keeping these as
+# constants guarantees every call reuses the same compiled statement instead of re-parsing.
+# The timestamp is taken inside SQLite, so inserts need no Python-side clock call or formatting
+_SQL_ADD_TX = ("INSERT INTO transactions (product_id, quantity, price, unit_price, date) "
+               "VALUES (?, ?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))")
+_SQL_CURRENT_QTY = "SELECT COALESCE((SELECT qty FROM product_stock WHERE product_id = ?), 0.0)"
+_SQL_LAST_PRICE = ("SELECT price FROM transactions WHERE product_id = ? AND quantity > 0 AND price IS NOT NULL "
+                   "AND date < ? ORDER BY date DESC LIMIT 1")
+_SQL_LAST_PURCHASE_DATE = ("SELECT datetime(date, 'unixepoch', 'localtime') FROM transactions WHERE product_id = ? AND quantity > 0 "
+                           "AND date < ? ORDER BY date DESC LIMIT 1")
+_SQL_PRODUCT_ID = "SELECT id FROM products WHERE name = ?"
+# Open ends of a history range are bound as the extreme integers, so every call shares one statement
+_SQL_PURCHASE_HISTORY = ("SELECT datetime(date, 'unixepoch', 'localtime'), quantity, price FROM transactions "
+                         "WHERE product_id = ? AND quantity > 0 AND date >= ? AND date < ? ORDER BY date ASC")
+
+# Nesting depth of _transaction() blocks on the shared connection (guarded by _write_lock);
+# only the outermost one commits
+_tx_depth = 0
+
+@contextmanager
+def _transaction() -> Iterator[None]:
+    """
+    Run the enclosed statements as one transaction on the shared connection.
+    Holds _write_lock for its duration, so writers from different threads never interleave, and
+    starts with BEGIN IMMEDIATE, so other processes cannot write in between either. Commits on
+    success and rolls back on error. Inside another _transaction() or bulk() block nothing is
+    committed here; the outermost block decides.
+    """
+    global _tx_depth
+    with _write_lock:
+        if _tx_depth:
+            _tx_depth += 1
+            try:
+                yield
+            finally:
+                _tx_depth -= 1
+            return
+        _tx_depth = 1
+        try:
+            # Take the write lock up front so reads inside the block cannot go stale before the writes
+            conn.execute("BEGIN IMMEDIATE")
+            yield
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            _tx_depth = 0
+
+@contextmanager
+def bulk() -> Iterator[None]:
+    """
+    Group many writes (e.g. an import of purchases) into a single commit.
+    The write functions below commit on their own when called alone; inside this block they
+    only stage their changes, and everything is committed once at the end (or rolled back if
+    any of them fails). The product lookup caches are cleared on exit.
+    Example:
+        with bulk():
+            for name, unit, qty, price in rows:
+                add_transaction(upsert_product(name, unit), qty, price)
+    """
+    try:
+        with _transaction():
+            yield
+    finally:
+        _invalidate_products()
+
+def _day_bounds(selected_date: date) -> Tuple[int, int]:
+    """
+    Get the range of unix seconds covering a local calendar day.
+    Args:
+        selected_date (date): The day.
+    Returns:
+        tuple: (start, end) - the day's first second and the next day's first second (exclusive).
+    """
+    start = int(datetime.combine(selected_date, time.min).timestamp())
+    end = int(datetime.combine(selected_date + timedelta(days=1), time.min).timestamp())
+    return start, end
+
 # Database Functions
 
-def add_product(name: str, unit: str) -> None:
+# Product lookups are cached in-process. Writes made here clear the caches directly; commits from
+# other processes (an import script, a second app instance) are detected through PRAGMA data_version,
+# which changes on this dedicated connection whenever any other connection commits.
+_product_ids: Dict[str, int] = {}  # Stripped name -> ID; only hits are stored
+_data_version_conn = _connect(_READ_URI, uri=True, isolation_level=None)
+_data_version_lock = threading.Lock()
+_seen_data_version: Optional[int] = None
+
+def _invalidate_products() -> None:
+    """
+    Clear the cached product lookups after products were added or removed.
+    """
+    _product_ids.clear()
+    _load_all_products.cache_clear()
+
+def _refresh_products() -> None:
+    """
+    Clear the cached product lookups if the database was committed to since the last check.
+    """
+    global _seen_data_version
+    with _data_version_lock:
+        version = _data_version_conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != _seen_data_version:
+            _seen_data_version = version
+            _invalidate_products()
+
+def add_product(name: str, unit: str) -> int:
     """
     Add a new product to the products table.
     Args:
         name (str): Name of the product (e.g., "Sugar" or "চিনি").
         unit (str): Unit of measurement (e.g., "kg" or "কিলোগ্রাম").
+    Returns:
+        int: ID of the new product, so callers need no follow-up get_product_id.
     """
     try:
-        c.execute("INSERT INTO products (name, unit) VALUES (?, ?)", (name.strip(), unit.strip()))
-        conn.commit()
+        with _transaction():
+            c.execute("INSERT INTO products (name, unit) VALUES (?, ?) RETURNING id", (name.strip(), unit.strip()))
+            product_id = c.fetchone()[0]
+        _invalidate_products()
         logger.info(f"Added product: {name} with unit {unit}")
+        return product_id
     except sqlite3.Error as e:
         logger.error(f"Error adding product {name}: {e}")
         raise
 
-def add_transaction(product_id: int, quantity: float, price: Optional[float] = None) -> None:
+def add_products_bulk(rows: Iterable[Tuple[str, str]]) -> int:
+    """
+    Add many products in one statement batch and one commit (e.g. when seeding a catalogue).
+    Names that already exist are skipped and keep their original unit.
+    Args:
+        rows (iterable): Tuples (name, unit) with the same meaning as in add_product.
+    Returns:
+        int: Number of products added.
+    """
+    try:
+        with _transaction():
+            c.executemany("INSERT INTO products (name, unit) VALUES (?, ?) ON CONFLICT(name) DO NOTHING",
+                          ((name.strip(), unit.strip()) for name, unit in rows))
+            count = c.rowcount
+        _invalidate_products()
+        logger.info(f"Added {count} products")
+        return count
+    except sqlite3.Error as e:
+        logger.error(f"Error adding products in bulk: {e}")
+        raise
+
+def upsert_product(name: str, unit: str) -> int:
+    """
+    Get the ID of a product by name, adding the product first if it doesn't exist (one round-trip).
+    An existing product keeps its original unit.
+    Args:
+        name (str): Name of the product (e.g., "Sugar" or "চিনি").
+        unit (str): Unit of measurement used if the product is new (e.g., "kg" or "কিলোগ্রাম").
+    Returns:
+        int: Product ID.
+    """
+    try:
+        # The no-op update makes RETURNING yield the existing row's ID on conflict
+        with _transaction():
+            c.execute("INSERT INTO products (name, unit) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET name = excluded.name RETURNING id",
+                      (name.strip(), unit.strip()))
+            product_id = c.fetchone()[0]
+        _invalidate_products()
+        logger.info(f"Resolved product {name} to product_id {product_id}")
+        return product_id
+    except sqlite3.Error as e:
+        logger.error(f"Error upserting product {name}: {e}")
+        raise
+
+def add_transaction(product_id: int, quantity: float, price: Optional[float] = None,
+                    unit_price: Optional[float] = None) -> None:
     """
     Add a transaction (purchase or sale) to the transactions table.
     Args:
         product_id (int): ID of the product.
         quantity (float): Quantity (positive for purchases, negative for sales).
         price (float, optional): Total purchase cost for purchases (None for sales).
+        unit_price (float, optional): Selling price per unit for sales (None for purchases).
     """
     try:
-        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        c.execute("INSERT INTO transactions (product_id, quantity, price, date) VALUES (?, ?, ?, ?)",
-                  (product_id, quantity, price, date))
-        conn.commit()
-        logger.info(f"Added transaction for product_id {product_id}: {quantity} at total cost {price} INR on {date}")
+        with _transaction():
+            c.execute(_SQL_ADD_TX, (product_id, quantity, price, unit_price))
+        logger.info(f"Added transaction for product_id {product_id}: {quantity} at total cost {price} INR (unit price {unit_price} INR)")
     except sqlite3.Error as e:
         logger.error(f"Error adding transaction for product_id {product_id}: {e}")
         raise
 
+def add_transactions_bulk(rows: Iterable[Tuple[int, float, Optional[float], Optional[float]]]) -> int:
+    """
+    Add many transactions in one statement batch and one commit (e.g. when importing purchases).
+    Each row is stamped with the time it is inserted.
+    Args:
+        rows (iterable): Tuples (product_id, quantity, price, unit_price) with the same meaning as in add_transaction.
+    Returns:
+        int: Number of transactions added.
+    """
+    try:
+        with _transaction():
+            c.executemany(_SQL_ADD_TX, rows)
+            count = c.rowcount
+        logger.info(f"Added {count} transactions")
+        return count
+    except sqlite3.Error as e:
+        logger.error(f"Error adding transactions in bulk: {e}")
+        raise
+
 def get_current_quantity(product_id: int) -> float:
     """
-    Calculate the current quantity of a product by summing all transactions.
+    Get the current quantity of a product from the running stock table.
     Args:
         product_id (int): ID of the product.
     Returns:
         float: Current quantity (purchases minus sales), or 0 if no transactions.
     """
     try:
-        c.execute("SELECT SUM(quantity) FROM transactions WHERE product_id = ?", (product_id,))
-        result = c.fetchone()[0]
-        return result if result is not None else 0.0
+        with _reader() as reader:
+            return reader.execute(_SQL_CURRENT_QTY, (product_id,)).fetchone()[0]
     except sqlite3.Error as e:
         logger.error(f"Error getting current quantity for product_id {product_id}: {e}")
         raise
 
-def get_last_price_before_date(product_id: int, target_date: Optional[str] = None) -> Optional[float]:
+def get_last_price_before_date(product_id: int, target_date: Optional[date] = None) -> Optional[float]:
     """
     Get the last total purchase cost of a product on or before a specific date.
     Args:
         product_id (int): ID of the product.
-        target_date (str, optional): Date in "YYYY-MM-DD HH:MM:SS" format, defaults to now.
+        target_date (date, optional): Last day to consider (inclusive), defaults to today.
     Returns:
         float: Last total cost, or None if no purchase exists.
     """
     try:
         if target_date is None:
-            target_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        c.execute("SELECT price FROM transactions WHERE product_id = ? AND quantity > 0 AND price IS NOT NULL AND date <= ? ORDER BY date DESC LIMIT 1",
-                  (product_id, target_date))
-        result = c.fetchone()
-        return result[0] if result else None
+            target_date = date.today()
+        with _reader() as reader:
+            result = reader.execute(_SQL_LAST_PRICE, (product_id, _day_bounds(target_date)[1])).fetchone()
+            return result[0] if result else None
     except sqlite3.Error as e:
         logger.error(f"Error getting last price for product_id {product_id} on {target_date}: {e}")
         raise
 
-def get_last_purchase_date(product_id: int, target_date: Optional[str] = None) -> Optional[str]:
+def get_last_purchase_date(product_id: int, target_date: Optional[date] = None) -> Optional[str]:
     """
     Get the date of the last purchase for a product on or before a specific date.
     Args:
         product_id (int): ID of the product.
-        target_date (str, optional): Date in "YYYY-MM-DD HH:MM:SS" format, defaults to now.
+        target_date (date, optional): Last day to consider (inclusive), defaults to today.
     Returns:
         str: Last purchase date in "YYYY-MM-DD HH:MM:SS" format, or None if no purchase exists.
     """
     try:
         if target_date is None:
-            target_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        c.execute("SELECT date FROM transactions WHERE product_id = ? AND quantity > 0 AND date <= ? ORDER BY date DESC LIMIT 1",
-                  (product_id, target_date))
-        result = c.fetchone()
-        return result[0] if result else None
+            target_date = date.today()
+        with _reader() as reader:
+            result = reader.execute(_SQL_LAST_PURCHASE_DATE, (product_id, _day_bounds(target_date)[1])).fetchone()
+            return result[0] if result else None
     except sqlite3.Error as e:
         logger.error(f"Error getting last purchase date for product_id {product_id} on {target_date}: {e}")
         raise
 
-def get_purchase_history(product_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Tuple[str, float, float]]:
+def iter_purchase_history(product_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                          on_date: Optional[date] = None) -> Iterator[Tuple[str, float, float]]:
     """
-    Retrieve the complete purchase history for a product within a specified date range.
+    Stream the purchase history for a product within a specified date range, one row at a time.
     Args:
         product_id (int): ID of the product.
         start_date (date, optional): Start date for the history (defaults to earliest transaction).
         end_date (date, optional): End date for the history (defaults to today).
-    Returns:
-        list: List of tuples (date, quantity, price) for all purchases, sorted by date, where price is total cost.
+        on_date (date, optional): Single day to restrict the history to (overrides start_date/end_date).
+    Yields:
+        tuple: (date, quantity, price) for each purchase, sorted by date, where price is total cost.
     """
     try:
-        query = "SELECT date, quantity, price FROM transactions WHERE product_id = ? AND quantity > 0"
-        params = [product_id]
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date.strftime("%Y-%m-%d 00:00:00"))
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date.strftime("%Y-%m-%d 23:59:59"))
-        
-        query += " ORDER BY date ASC"
-        c.execute(query, params)
-        return c.fetchall()
+        if on_date:
+            # Filter as a range on the raw column so idx_transactions_purchase can be used
+            start_date = end_date = on_date
+        start = _day_bounds(start_date)[0] if start_date else -2**63
+        end = _day_bounds(end_date)[1] if end_date else 2**63 - 1
+        # Answered entirely from idx_transactions_purchase, already in date order
+        with _reader() as reader:
+            yield from reader.execute(_SQL_PURCHASE_HISTORY, (product_id, start, end))
     except sqlite3.Error as e:
         logger.error(f"Error retrieving purchase history for product_id {product_id}: {e}")
         raise
 
+def get_purchase_history(product_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                         on_date: Optional[date] = None) -> List[Tuple[str, float, float]]:
+    """
+    Retrieve the complete purchase history for a product within a specified date range.
+    Args:
+        product_id (int): ID of the product.
+        start_date (date, optional): Start date for the history (defaults to earliest transaction).
+        end_date (date, optional): End date for the history (defaults to today).
+        on_date (date, optional): Single day to restrict the history to (overrides start_date/end_date).
+    Returns:
+        list: List of tuples (date, quantity, price) for all purchases, sorted by date, where price is total cost.
+    """
+    return list(iter_purchase_history(product_id, start_date, end_date, on_date))
+
 def get_all_products() -> List[Tuple[int, str, str]]:
     """
     Retrieve all products from the products table.
+    Cached until the database changes (from this or any other process); callers must not modify
+    the returned list.
     Returns:
         list: List of tuples (id, name, unit) for all products.
     """
     try:
-        c.execute("SELECT id, name, unit FROM products")
-        return c.fetchall()
+        _refresh_products()
+        return _load_all_products()
     except sqlite3.Error as e:
         logger.error(f"Error retrieving all products: {e}")
         raise
 
+@lru_cache(maxsize=1)
+def _load_all_products() -> List[Tuple[int, str, str]]:
+    """
+    Read all products; backs get_all_products' cache.
+    Returns:
+        list: List of tuples (id, name, unit) for all products.
+    """
+    try:
+        with _reader() as reader:
+            cur = reader.execute("SELECT id, name, unit FROM products")
+            return cur.fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Error retrieving all products: {e}")
+        raise
+
+def get_inventory_snapshot() -> List[Tuple[int, str, str, float, Optional[float], Optional[str]]]:
+    """
+    Retrieve current stock, last purchase cost and last purchase date for every product in one query.
+    Returns:
+        list: List of tuples (id, name, unit, quantity, last_price, last_date), where last_price is total cost
+              and last_price/last_date are None if the product has no purchases.
+    """
+    try:
+        with _reader() as reader:
+            cur = reader.execute("""
+                SELECT p.id, p.name, p.unit,
+                       COALESCE(s.qty, 0.0),
+                       (SELECT price FROM transactions
+                        WHERE product_id = p.id AND quantity > 0 AND price IS NOT NULL
+                        ORDER BY date DESC LIMIT 1),
+                       (SELECT datetime(date, 'unixepoch', 'localtime') FROM transactions
+                        WHERE product_id = p.id AND quantity > 0
+                        ORDER BY date DESC LIMIT 1)
+                FROM products p
+                LEFT JOIN product_stock s ON s.product_id = p.id
+            """)
+            return cur.fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Error retrieving inventory snapshot: {e}")
+        raise
+
 def get_product_id(name: str) -> Optional[int]:
     """
     Get the ID of a product by its name.
+    Found IDs are cached until the database changes (from this or any other process); misses are
+    not, so a product added elsewhere is found on the next lookup.
     Args:
         name (str): Name of the product (e.g., "Sugar" or "চিনি").
     Returns:
         int: Product ID, or None if not found.
     """
+    # Strip before the cache lookup so "Sugar" and " Sugar " share one entry.
+    name = name.strip()
     try:
-        c.execute("SELECT id FROM products WHERE name = ?", (name.strip(),))
-        result = c.fetchone()
-        return result[0] if result else None
+        _refresh_products()
+        product_id = _product_ids.get(name)
+        if product_id is None:
+            with _reader() as reader:
+                result = reader.execute(_SQL_PRODUCT_ID, (name,)).fetchone()
+            if result is None:
+                return None
+            product_id = _product_ids[name] = result[0]
+        return product_id
     except sqlite3.Error as e:
         logger.error(f"Error getting ID for product {name}: {e}")
         raise
 
-def get_transactions_by_date(selected_date: date) -> List[Tuple[int, str, float, float, str, str]]:
+def find_product_ignore_case(name: str) -> Optional[Tuple[int, str, str]]:
     """
-    Retrieve all purchase transactions for a specific date.
+    Find the product whose name equals the given one, ignoring case (ASCII letters).
+    Uses idx_products_name_lower, so it is an index seek rather than a scan of products.
     Args:
-        selected_date (date): Date object (e.g., from datetime.date).
+        name (str): Name of the product (e.g., "sugar" or "চিনি").
     Returns:
-        list: List of tuples (transaction_id, product_name, quantity, price, unit, date) for purchases on that date, where price is total cost.
+        tuple: (id, name, unit) of the oldest matching product, or None if not found.
     """
     try:
-        start_date = selected_date.strftime("%Y-%m-%d 00:00:00")
-        end_date = selected_date.strftime("%Y-%m-%d 23:59:59")
-        c.execute("SELECT t.id, p.name, t.quantity, t.price, p.unit, t.date FROM transactions t JOIN products p ON t.product_id = p.id WHERE t.quantity > 0 AND t.date BETWEEN ? AND ?",
-                  (start_date, end_date))
-        return c.fetchall()
+        with _reader() as reader:
+            return reader.execute("SELECT id, name, unit FROM products WHERE LOWER(name) = LOWER(?) ORDER BY id LIMIT 1",
+                                  (name.strip(),)).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Error finding product {name} ignoring case: {e}")
+        raise
+
+def find_products_like(term: str, limit: int = 20) -> List[Tuple[int, str, str]]:
+    """
+    Find products whose name contains a search term, ignoring case.
+    Args:
+        term (str): Text to search for (e.g., "sug" or "চিনি").
+        limit (int): Maximum number of matches to return (default: 20).
+    Returns:
+        list: List of tuples (id, name, unit) for matching products, ordered by ID.
+    """
+    try:
+        # Escape LIKE wildcards so they are matched literally
+        pattern = term.strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with _reader() as reader:
+            cur = reader.execute("SELECT id, name, unit FROM products WHERE LOWER(name) LIKE ? ESCAPE '\\' ORDER BY id LIMIT ?",
+                                 (f"%{pattern}%", limit))
+            return cur.fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Error searching products for {term}: {e}")
+        raise
+
+def iter_transactions_by_date(selected_date: date) -> Iterator[Tuple[int, str, float, float, str, str]]:
+    """
+    Stream purchase transactions for a specific date, one row at a time.
+    Args:
+        selected_date (date): Date object (e.g., from datetime.date).
+    Yields:
+        tuple: (transaction_id, product_name, quantity, price, unit, date) for each purchase on that date, where price is total cost.
+    """
+    try:
+        start_date, end_date = _day_bounds(selected_date)
+        # Use a dedicated cursor so callers may run other queries while iterating
+        with _reader() as reader:
+            cursor = reader.execute("SELECT t.id, p.name, t.quantity, t.price, p.unit, datetime(t.date, 'unixepoch', 'localtime') FROM transactions t JOIN products p ON t.product_id = p.id WHERE t.quantity > 0 AND t.date >= ? AND t.date < ?",
+                                    (start_date, end_date))
+            for row in cursor:
+                yield row
     except sqlite3.Error as e:
         logger.error(f"Error retrieving transactions for {selected_date}: {e}")
         raise
 
+def get_transactions_by_date(selected_date: date) -> List[Tuple[int, str, float, float, str, str]]:
+    """
+    Retrieve all purchase transactions for a specific date.
+    Args:
+        selected_date (date): Date object (e.g., from datetime.date).
+    Returns:
+        list: List of tuples (transaction_id, product_name, quantity, price, unit, date) for purchases on that date, where price is total cost.
+    """
+    return list(iter_transactions_by_date(selected_date))
+
 def delete_transaction(transaction_id: int) -> Tuple[bool, str]:
     """
     Delete a specific transaction and clean up related products if no transactions remain.
@@ -251,23 +794,31 @@ def delete_transaction(transaction_id: int) -> Tuple[bool, str]:
         tuple: (bool, str) - (success, message) indicating if deletion succeeded or why it failed.
     """
     try:
-        c.execute("SELECT product_id, quantity FROM transactions WHERE id = ?", (transaction_id,))
-        trans = c.fetchone()
-        if trans:
-            product_id, quantity = trans
-            current_qty = get_current_quantity(product_id)
-            if current_qty - quantity < 0:
-                return False, "Cannot delete: would result in negative stock."
-            c.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
-            conn.commit()
-            logger.info(f"Deleted transaction {transaction_id} for product_id {product_id}")
-            c.execute("SELECT COUNT(*) FROM transactions WHERE product_id = ?", (product_id,))
-            if c.fetchone()[0] == 0:
-                c.execute("DELETE FROM products WHERE id = ?", (product_id,))
-                conn.commit()
-                logger.info(f"Cleaned up product_id {product_id} with no remaining transactions")
-            return True, "Transaction deleted successfully."
-        return False, "Transaction not found."
+        # Guard, delete and product cleanup commit together (or not at all); the stock guard is part
+        # of the DELETE itself, so a second query only runs when nothing was deleted. It reads the
+        # running total in product_stock and rounds like the triggers do, so float noise from decimal
+        # quantities (0.1 + 0.7 - 0.7) cannot block a valid delete
+        with _transaction():
+            row = c.execute("""
+                DELETE FROM transactions
+                WHERE id = ?
+                  AND ROUND(COALESCE((SELECT qty FROM product_stock s WHERE s.product_id = transactions.product_id), 0)
+                            - COALESCE(quantity, 0), 9) >= 0
+                RETURNING product_id
+            """, (transaction_id,)).fetchone()
+            if row is None:
+                exists = c.execute("SELECT 1 FROM transactions WHERE id = ?", (transaction_id,)).fetchone()
+                return False, ("Cannot delete: would result in negative stock." if exists else "Transaction not found.")
+            product_id = row[0]
+            c.execute("DELETE FROM products WHERE id = ? AND NOT EXISTS (SELECT 1 FROM transactions WHERE product_id = ?)",
+                      (product_id, product_id))
+            product_removed = c.rowcount > 0
+        if product_removed:
+            _invalidate_products()
+        logger.info(f"Deleted transaction {transaction_id} for product_id {product_id}")
+        if product_removed:
+            logger.info(f"Cleaned up product_id {product_id} with no remaining transactions")
+        return True, "Transaction deleted successfully."
     except sqlite3.Error as e:
         logger.error(f"Error deleting transaction {transaction_id}: {e}")
         raise
@@ -279,16 +830,16 @@ def get_daily_transactions(selected_date: date) -> List[Tuple[str, float, float,
         list: List of tuples (product_name, quantity, price, type) where type is 'purchase' or 'sale', and price is total cost for purchases.
     """
     try:
-        start_date = selected_date.strftime("%Y-%m-%d 00:00:00")
-        end_date = selected_date.strftime("%Y-%m-%d 23:59:59")
-        c.execute("""
-            SELECT p.name, t.quantity, t.price, 
-                   CASE WHEN t.quantity > 0 THEN 'purchase' ELSE 'sale' END as type
-            FROM transactions t 
-            JOIN products p ON t.product_id = p.id 
-            WHERE t.date BETWEEN ? AND ?
-        """, (start_date, end_date))
-        return c.fetchall()
+        start_date, end_date = _day_bounds(selected_date)
+        with _reader() as reader:
+            cur = reader.execute("""
+                SELECT p.name, t.quantity, t.price, 
+                       CASE WHEN t.quantity > 0 THEN 'purchase' ELSE 'sale' END as type
+                FROM transactions t 
+                JOIN products p ON t.product_id = p.id 
+                WHERE t.date >= ? AND t.date < ?
+            """, (start_date, end_date))
+            return cur.fetchall()
     except sqlite3.Error as e:
         logger.error(f"Error retrieving daily transactions for {selected_date}: {e}")
         raise
@@ -300,11 +851,17 @@ def calculate_daily_earnings(selected_date: date) -> float:
         float: Net earnings in INR (negative for net purchase costs, positive for net sales revenue).
     """
     try:
-        transactions = get_daily_transactions(selected_date)
-        # For purchases, price is the total cost, no multiplication by quantity
-        purchase_cost = sum(price for _, quantity, price, trans_type in transactions if trans_type == 'purchase' and price is not None)
-        # For sales, price is assumed per-unit (adjust if total cost is needed later)
-        sale_revenue = sum(price * abs(quantity) for _, quantity, price, trans_type in transactions if trans_type == 'sale' and price is not None)
+        start_date, end_date = _day_bounds(selected_date)
+        # For purchases, price is the total cost, no multiplication by quantity.
+        # For sales, revenue is the per-unit selling price times the quantity sold.
+        # Every transaction belongs to a product (NOT NULL + foreign key), so no join is needed
+        with _reader() as reader:
+            purchase_cost, sale_revenue = reader.execute("""
+                SELECT COALESCE(SUM(CASE WHEN quantity > 0 THEN price END), 0.0),
+                       COALESCE(SUM(CASE WHEN quantity <= 0 THEN unit_price * -quantity END), 0.0)
+                FROM transactions
+                WHERE date >= ? AND date < ?
+            """, (start_date, end_date)).fetchone()
         net_earnings = sale_revenue - purchase_cost
         logger.info(f"Calculated daily earnings for {selected_date}: Sales Revenue={sale_revenue}, Purchase Cost={purchase_cost}, Net={net_earnings}")
         return net_earnings
@@ -318,23 +875,56 @@ def estimate_daily_needs(selected_date: date) -> Dict[str, float]:
     Returns:
         dict: Mapping of product names to estimated quantities needed (in units).
     """
+    # Same single grouped query as the Daily Summary page, keeping the needs rule in one place;
+    # the cursor is walked directly, so only the dict is built
+    return {name: need for name, _, _, need in iter_daily_summary_agg(selected_date) if need is not None}
+
+def iter_daily_summary_agg(selected_date: date) -> Iterator[Tuple[str, str, float, Optional[float]]]:
+    """
+    Stream per-product earnings and estimated needs for a specific date from a single aggregate query.
+    Earnings follow the same rules as calculate_daily_earnings; estimate_daily_needs is built from this.
+    Args:
+        selected_date (date): Date to summarize.
+    Yields:
+        tuple: (product_name, unit, earnings, need) for each product, where earnings is the product's
+               sales revenue minus purchase costs on that date, and need is the estimated quantity
+               needed (None if the product has no entry in the estimate).
+    """
     try:
-        transactions = get_daily_transactions(selected_date)
-        needs = {}
-        for product_name, quantity, _, trans_type in transactions:
-            if trans_type == 'sale':
-                needs[product_name] = needs.get(product_name, 0) + abs(quantity)
-        for product_id, name, unit in get_all_products():
-            current_qty = get_current_quantity(product_id)
-            if name in needs and current_qty < needs[name]:
-                needs[name] = max(0, needs[name] - current_qty)
-            elif name not in needs and current_qty == 0:
-                needs[name] = 0.0  # No immediate need if stock exists
-        return needs
-    except Exception as e:
-        logger.error(f"Error estimating daily needs for {selected_date}: {e}")
+        start_date, end_date = _day_bounds(selected_date)
+        with _reader() as reader:
+            # The needs rule runs in SQL, so rows come back ready to use: sold today vs current stock,
+            # 0 for an untouched product that is out of stock, NULL for one that needs nothing
+            cur = reader.execute("""
+                SELECT name, unit, earnings,
+                       CASE WHEN sold IS NOT NULL THEN (CASE WHEN current_qty < sold THEN MAX(0, sold - current_qty) ELSE sold END)
+                            WHEN current_qty = 0 THEN 0.0
+                       END
+                FROM (SELECT p.name, p.unit,
+                             COALESCE(SUM(CASE WHEN t.quantity > 0 THEN -t.price ELSE t.unit_price * -t.quantity END), 0.0) AS earnings,
+                             SUM(CASE WHEN t.quantity <= 0 THEN -t.quantity END) AS sold,
+                             COALESCE(s.qty, 0.0) AS current_qty
+                      FROM products p
+                      LEFT JOIN product_stock s ON s.product_id = p.id
+                      LEFT JOIN transactions t ON t.product_id = p.id AND t.date >= ? AND t.date < ?
+                      GROUP BY p.id)
+            """, (start_date, end_date))
+            yield from cur
+    except sqlite3.Error as e:
+        logger.error(f"Error aggregating daily summary for {selected_date}: {e}")
         raise
 
+def daily_summary_agg(selected_date: date) -> List[Tuple[str, str, float, Optional[float]]]:
+    """
+    Compute per-product earnings and estimated needs for a specific date in a single aggregate query.
+    Args:
+        selected_date (date): Date to summarize.
+    Returns:
+        list: List of tuples (product_name, unit, earnings, need) for all products, as yielded by
+              iter_daily_summary_agg.
+    """
+    return list(iter_daily_summary_agg(selected_date))
+
 def save_daily_summary(selected_date: date, cash_in: float, cash_out: float, purchase_costs: float, profit_loss: float) -> None:
     """
     Save the daily cash flow summary for a specific date.
@@ -352,11 +942,11 @@ def save_daily_summary(selected_date: date, cash_in: float, cash_out: float, pur
         purchase_costs = float(purchase_costs) if purchase_costs is not None else 0.0
         profit_loss = float(profit_loss) if profit_loss is not None else 0.0
 
-        c.execute("""
-            INSERT OR REPLACE INTO daily_summaries (date, cash_in, cash_out, purchase_costs, profit_loss)
-            VALUES (?, ?, ?, ?, ?)
-        """, (date_str, cash_in, cash_out, purchase_costs, profit_loss))
-        conn.commit()
+        with _transaction():
+            c.execute("""
+                INSERT OR REPLACE INTO daily_summaries (date, cash_in, cash_out, purchase_costs, profit_loss)
+                VALUES (?, ?, ?, ?, ?)
+            """, (date_str, cash_in, cash_out, purchase_costs, profit_loss))
         logger.info(f"Saved daily summary for {date_str}: Cash In={cash_in}, Cash Out={cash_out}, Purchase Costs={purchase_costs}, Profit/Loss={profit_loss}")
     except (sqlite3.Error, ValueError) as e:
         logger.error(f"Error saving daily summary for {selected_date}: {e}")
@@ -373,8 +963,9 @@ def get_daily_summary(selected_date: date) -> Optional[Tuple[float, float, float
     try:
         date_str = selected_date.isoformat()
         logger.info(f"Querying daily summary for date: {date_str}")
-        c.execute("SELECT cash_in, cash_out, purchase_costs, profit_loss FROM daily_summaries WHERE date = ?", (date_str,))
-        result = c.fetchone()
+        with _reader() as reader:
+            cur = reader.execute("SELECT cash_in, cash_out, purchase_costs, profit_loss FROM daily_summaries WHERE date = ?", (date_str,))
+            result = cur.fetchone()
         if result:
             return (float(result[0]), float(result[1]), float(result[2]), float(result[3]))
         return None
@@ -392,22 +983,20 @@ def delete_daily_summary(selected_date: date) -> Tuple[bool, str]:
     """
     try:
         date_str = selected_date.isoformat()
-        start_date = selected_date.strftime("%Y-%m-%d 00:00:00")
-        end_date = selected_date.strftime("%Y-%m-%d 23:59:59")
-
-        # Check if a summary exists
-        c.execute("SELECT date FROM daily_summaries WHERE date = ?", (date_str,))
-        summary_exists = c.fetchone() is not None
+        start_date, end_date = _day_bounds(selected_date)
 
-        # Delete purchase transactions for the date (quantity > 0)
-        c.execute("DELETE FROM transactions WHERE date BETWEEN ? AND ? AND quantity > 0", (start_date, end_date))
-        trans_deleted = c.rowcount
+        # Check, delete transactions and delete the summary as one atomic write
+        with _transaction():
+            c.execute("SELECT date FROM daily_summaries WHERE date = ?", (date_str,))
+            summary_exists = c.fetchone() is not None
 
-        # Delete the summary
-        c.execute("DELETE FROM daily_summaries WHERE date = ?", (date_str,))
-        summary_deleted = c.rowcount
+            # Delete purchase transactions for the date (quantity > 0)
+            c.execute("DELETE FROM transactions WHERE date >= ? AND date < ? AND quantity > 0", (start_date, end_date))
+            trans_deleted = c.rowcount
 
-        conn.commit()
+            # Delete the summary
+            c.execute("DELETE FROM daily_summaries WHERE date = ?", (date_str,))
+            summary_deleted = c.rowcount
 
         if summary_exists or trans_deleted > 0:
             message = f"Daily summary and {trans_deleted} transaction(s) for {date_str} deleted successfully."
@@ -428,10 +1017,18 @@ def prune_old_transactions(keep_years: int = 2) -> None:
         keep_years (int): Number of years to retain transactions (default: 2).
     """
     try:
-        cutoff_date = datetime.now().replace(year=datetime.now().year - keep_years).strftime("%Y-%m-%d %H:%M:%S")
-        c.execute("DELETE FROM transactions WHERE date < ?", (cutoff_date,))
-        conn.commit()
-        logger.info(f"Pruned transactions older than {keep_years} years (cutoff: {cutoff_date})")
+        with _transaction():
+            # Range delete on the tail of idx_transactions_date. The cutoff is computed by SQLite on the
+            # local calendar (Feb 29 rolls over to Mar 1 instead of failing) and converted to unix seconds.
+            c.execute("DELETE FROM transactions WHERE date < CAST(strftime('%s', 'now', 'localtime', ?, 'utc') AS INTEGER)",
+                      (f"-{keep_years} years",))
+        with _write_lock:
+            # Release the freed pages and refresh planner statistics, which a large prune can skew.
+            # executescript steps the vacuum to completion (execute() frees a single page), but it
+            # would also commit an enclosing bulk() block, so skip it there.
+            if not conn.in_transaction:
+                conn.executescript("PRAGMA incremental_vacuum; PRAGMA optimize;")
+        logger.info(f"Pruned transactions older than {keep_years} years")
     except sqlite3.Error as e:
         logger.error(f"Error pruning old transactions: {e}")
         raise
@@ -443,9 +1040,20 @@ def backup_database(backup_path: str = "backup_inventory.db") -> None:
         backup_path (str): Path where the backup file will be saved (default: "backup_inventory.db").
     """
     try:
-        shutil.copy2(DB_PATH, backup_path)
+        # SQLite's online backup copies a consistent snapshot (WAL contents included) in batches of
+        # pages from a pooled read connection, so writers are never blocked while it runs.
+        # It writes to a temporary file that replaces backup_path only once complete, so a failed
+        # run never leaves a partial file in place of the previous backup.
+        tmp_path = backup_path + ".tmp"
+        dest = sqlite3.connect(tmp_path)
+        try:
+            with _reader() as reader:
+                reader.backup(dest, pages=1024)
+        finally:
+            dest.close()
+        os.replace(tmp_path, backup_path)
         logger.info(f"Backed up database to {backup_path}")
-    except OSError as e:
+    except (sqlite3.Error, OSError) as e:
         logger.error(f"Error backing up database: {e}")
         raise
 